@@ -4,29 +4,330 @@ import json
 import os
 from dotenv import load_dotenv
 import threading
-import librosa
+import socket
+import collections
+import concurrent.futures
+import functools
+import numpy as np
 import soundfile as sf
-import io
-import sunau
-import aifc
 import time
+import logging
+import mmap
+import re
+import struct
+from dataclasses import dataclass, field
 
 import base64
 
+try:
+    import orjson # Optional: C JSON codec, several times faster than the standard library
+except ImportError:
+    orjson = None
+
+try:
+    import soxr # Optional: SIMD polyphase resampler, much faster than librosa's default
+except ImportError:
+    soxr = None
+
+try:
+    import pybase64 # Optional: SIMD (SSSE3/AVX2/NEON) base64 codec, drop-in for base64
+except ImportError:
+    pybase64 = None
+
+_b64encode = pybase64.b64encode if pybase64 else base64.b64encode
+
+@functools.cache
+def _librosa():
+    """Imports librosa on first use; it is heavy and only needed as a decode/resample fallback."""
+    import librosa
+    return librosa
+
+logger = logging.getLogger(__name__)
+
 # Load environment variables from .env file
 load_dotenv()
 
 # --- Configuration ---
+# Checked when connecting rather than at import, so the offline helpers and tests work without a key
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") 
 
-if not OPENAI_API_KEY:
-    raise ValueError("OPENAI_API_KEY environment variable not set. Please set it or replace the placeholder.")
-
 URL = "wss://api.openai.com/v1/realtime?model=gpt-4o-realtime-preview"
-HEADERS = [
+# Immutable so every client shares the one module-level instance without risk of mutation
+HEADERS = (
     f"Authorization: Bearer {OPENAI_API_KEY}",
     "OpenAI-Beta: realtime=v1"
-]
+)
+
+# Kernel send/receive buffer size applied to the WebSocket's TCP socket (1 MiB)
+SOCKET_BUFFER_SIZE = 1 << 20
+
+# Options websocket-client applies to the TCP socket before it connects, so they also cover
+# the TLS and WebSocket handshakes. SO_RCVBUF in particular only sets the TCP window scale
+# when applied before connect; raising it afterwards cannot grow the advertised window.
+SOCKET_OPTIONS = (
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE),
+    (socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE),
+)
+
+# Sample rate audio is converted to before it is sent
+TARGET_SAMPLE_RATE = 16000
+
+# soxr quality for speech resampling; 'MQ' is audibly identical to 'HQ' at 16 kHz and several times faster
+RESAMPLE_QUALITY = 'MQ'
+# librosa resampler used when soxr is absent (librosa's soxr_* types need soxr too); polyphase is scipy-based
+_LIBROSA_RES_TYPE = f'soxr_{RESAMPLE_QUALITY.lower()}' if soxr else 'polyphase'
+
+# Canonical 44-byte PCM WAV header: RIFF chunk, 16-byte fmt chunk, data chunk header
+_WAV_HEADER = struct.Struct('<4sI4s4sIHHIIHH4sI')
+
+def _pcm16_wav_header(data_size, sample_rate, channels=1):
+    """Packs the WAV header for data_size bytes of PCM16 audio in a single call."""
+    block_align = channels * 2
+    return _WAV_HEADER.pack(b'RIFF', 36 + data_size, b'WAVE', b'fmt ', 16, 1, channels,
+                            sample_rate, sample_rate * block_align, block_align, 16, b'data', data_size)
+
+_RIFF_CHUNK = struct.Struct('<4sI')
+
+def _wav_data_chunk(wav_bytes):
+    """Returns a memoryview of the samples in a WAV file's data chunk, skipping any other chunks."""
+    view = memoryview(wav_bytes)
+    offset = 12 # After 'RIFF', the RIFF size and 'WAVE'
+    while offset + _RIFF_CHUNK.size <= len(view):
+        chunk_id, chunk_size = _RIFF_CHUNK.unpack_from(view, offset)
+        offset += _RIFF_CHUNK.size
+        if chunk_id == b'data':
+            return view[offset:offset + chunk_size]
+        offset += chunk_size + (chunk_size & 1) # Chunks are padded to an even size
+    raise ValueError("WAV file has no data chunk")
+
+# Maximum number of received messages buffered for the send_*_validate consumers
+INBOX_MAXSIZE = 256
+
+# Connection lifecycle flags, OR-ed into OpenAIRealtimeClient._state as they are reached
+STATE_OPEN = 1
+STATE_SESSION_CREATED = 2
+STATE_CLOSED = 4
+
+# Base64 characters per input_audio_buffer.append frame: 6144 PCM16 bytes, 192 ms at 16 kHz mono.
+# A multiple of 4, so every chunk is valid base64 on its own and the encoded audio is sliced, not re-encoded.
+APPEND_CHUNK_CHARS = 8192
+
+# JSON codec for WebSocket frames: orjson when installed, otherwise a shared compact
+# stdlib encoder (json.dumps would build a new encoder per call). Contract for both:
+# _json_loads accepts str or bytes and raises json.JSONDecodeError (orjson's error
+# subclasses it); the stdlib fallback json.loads already reuses one module-level
+# JSONDecoder when called without options. _json_encode returns a compact str and
+# _json_dumps the same as UTF-8 bytes, ready to send without another encode.
+if orjson:
+    _json_loads = orjson.loads
+    _json_dumps = orjson.dumps
+
+    def _json_encode(obj):
+        return orjson.dumps(obj).decode()
+else:
+    _json_loads = json.loads
+    _json_encode = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False).encode
+
+    def _json_dumps(obj):
+        return _json_encode(obj).encode()
+
+# Data paths, resolved once at import rather than per call
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SESSION_UPDATE_PATH = os.path.join(_PROJECT_ROOT, 'data', 'session_events', 'session_update.json')
+AUDIO_DATA_DIR = os.path.join(_PROJECT_ROOT, 'data', 'audio')
+
+@functools.cache
+def _session_update_bytes():
+    """
+    Returns the session.update event from SESSION_UPDATE_PATH, validated and serialized
+    to compact bytes. The file is static, so this happens once per process.
+    """
+    with open(SESSION_UPDATE_PATH, 'rb') as f:
+        return _json_dumps(_json_loads(f.read()))
+
+# Transcription events streamed for a committed buffer, and those that end the stream
+TRANSCRIPTION_STREAM_TYPES = frozenset({
+    "conversation.item.input_audio_transcription.delta"
+})
+TRANSCRIPTION_TERMINAL_TYPES = frozenset({
+    "conversation.item.input_audio_transcription.completed",
+    "conversation.item.input_audio_transcription.failed"
+})
+
+# Responses collected after input_audio_buffer.commit, in the order they are reported
+_COMMIT_RESPONSE_TYPES = (
+    "input_audio_buffer.committed",
+    "conversation.item.created",
+    "conversation.item.input_audio_transcription.delta",
+    "conversation.item.input_audio_transcription.completed"
+)
+_COMMIT_EXPECTED_TYPES = frozenset(_COMMIT_RESPONSE_TYPES)
+# Every commit response entry carries these keys; unset ones stay None
+_COMMIT_ENTRY_FIELDS = ("event_id", "item_id", "type", "transcript")
+
+@dataclass(slots=True)
+class _CommitAccumulator:
+    """
+    State collected while waiting for the commit responses: the per-type entries,
+    the types seen so far and the streamed transcript text.
+    """
+    responses: dict = field(default_factory=lambda: {msg_type: dict.fromkeys(_COMMIT_ENTRY_FIELDS) for msg_type in _COMMIT_RESPONSE_TYPES})
+    received_types: set = field(default_factory=set)
+    transcript_parts: list = field(default_factory=list) # Joined once in finish(); str += re-copies the whole transcript per delta
+
+    def record(self, msg):
+        """
+        Records one message received after the commit: fills in its entry if it is
+        one of the commit responses, and reports it. Returns True if it ended transcription.
+        """
+        msg_type = msg.get("type")
+        if msg_type in _COMMIT_EXPECTED_TYPES:
+            print(f"Processing '{msg_type}' event.")
+            entry = self.responses[msg_type]
+            entry["event_id"] = msg.get("event_id")
+            entry["item_id"] = msg.get("item_id") or msg.get("item", {}).get("id")
+            entry["type"] = msg_type
+
+            # For created/delta/completed, capture transcript
+            handler = _COMMIT_TRANSCRIPT_HANDLERS.get(msg_type)
+            if handler:
+                handler(self, msg, entry)
+            self.received_types.add(msg_type)
+            if msg_type not in TRANSCRIPTION_STREAM_TYPES: # Deltas are already echoed by their handler
+                print(f"Validation successful: '{msg_type}' received with event_id: '{entry['event_id']}', item_id: '{entry['item_id']}'")
+        elif msg_type in TRANSCRIPTION_TERMINAL_TYPES:
+            print(f"Transcription ended with '{msg_type}': {msg.get('error')}")
+        else:
+            logger.debug("Received unhandled message type: %s", msg_type)
+        return msg_type in TRANSCRIPTION_TERMINAL_TYPES
+
+    def on_transcription_delta(self, msg, entry):
+        delta = msg.get("delta")
+        if delta:
+            self.transcript_parts.append(delta)
+        logger.debug("Delta transcript: %s", delta)
+
+    def on_transcription_completed(self, msg, entry):
+        entry["transcript"] = msg.get("transcript")
+        logger.debug("Final transcript: %s", msg.get("transcript"))
+
+    def on_item_created(self, msg, entry):
+        # transcript may be null here
+        content = msg.get("item", {}).get("content", [])
+        if content and isinstance(content, list):
+            entry["transcript"] = content[0].get("transcript")
+
+    def finish(self):
+        """Materializes the streamed transcript and returns the response entries."""
+        if "conversation.item.input_audio_transcription.delta" in self.received_types:
+            delta_entry = self.responses["conversation.item.input_audio_transcription.delta"]
+            delta_entry["transcript"] = "".join(self.transcript_parts)
+            completed_entry = self.responses["conversation.item.input_audio_transcription.completed"]
+            if "conversation.item.input_audio_transcription.completed" in self.received_types and not completed_entry["transcript"]:
+                # Fall back to the streamed text when the server sent no consolidated transcript
+                completed_entry["transcript"] = delta_entry["transcript"]
+        return self.responses
+
+# Type-specific transcript handlers, defined once at import rather than as closures per call
+_COMMIT_TRANSCRIPT_HANDLERS = {
+    "conversation.item.input_audio_transcription.delta": _CommitAccumulator.on_transcription_delta,
+    "conversation.item.input_audio_transcription.completed": _CommitAccumulator.on_transcription_completed,
+    "conversation.item.created": _CommitAccumulator.on_item_created
+}
+
+# Fields each validated server event must carry; the type itself is already proven by dispatch
+_REQUIRED_FIELDS = {
+    "session.created": ("event_id", "session"),
+    "session.updated": ("event_id", "session"),
+    "input_audio_buffer.speech_started": ("event_id", "item_id"),
+    "input_audio_buffer.cleared": ("event_id",),
+    "conversation.item.retrieved": ("event_id", "item"),
+    "conversation.item.deleted": ("event_id", "item_id")
+}
+
+def _missing_fields(msg_type, data):
+    """Returns the required fields of msg_type that are absent or empty in data."""
+    return tuple(field for field in _REQUIRED_FIELDS.get(msg_type, ()) if not data.get(field))
+
+AUDIO_CACHE_MAXSIZE = 64
+BATCH_DECODE_AHEAD = 2 # Files decoded ahead of the encoder in batch_process_audio; bounds memory held
+
+# Base64 audio keyed by (path, mtime_ns, size), most recently used last
+_audio_base64_cache = collections.OrderedDict()
+
+def _source_stamp(source_stat):
+    """Returns the mtime and size of a source file as the stamp saved with its processed files."""
+    return b"%d %d" % (source_stat.st_mtime_ns, source_stat.st_size)
+
+SAVE_POOL_WORKERS = 4
+
+# Writes processed audio to disk for every client in the process, created on first use.
+# Its worker threads are joined at interpreter exit, so queued saves still complete.
+_save_pool = None
+_save_pool_lock = threading.Lock()
+
+_WRITE_FLAGS = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, "O_BINARY", 0) # O_BINARY: Windows only
+
+def _write_file(path, *chunks):
+    """
+    Writes bytes-like chunks to path, in order, through the raw file descriptor.
+    A one-shot write of large buffers gains nothing from the buffered file layer,
+    and on POSIX all chunks go out in a single writev call without being joined.
+    """
+    fd = os.open(path, _WRITE_FLAGS, 0o644)
+    try:
+        views = [memoryview(chunk) for chunk in chunks]
+        if hasattr(os, "writev"):
+            written = os.writev(fd, views)
+            remaining = []
+            for view in views: # Keep whatever a short write left over
+                if written >= view.nbytes:
+                    written -= view.nbytes
+                else:
+                    remaining.append(view[written:])
+                    written = 0
+            views = remaining
+        for view in views:
+            while view: # os.write may write less than asked for very large buffers
+                view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+def _get_save_pool():
+    global _save_pool
+    with _save_pool_lock:
+        if _save_pool is None:
+            _save_pool = concurrent.futures.ThreadPoolExecutor(max_workers=SAVE_POOL_WORKERS, thread_name_prefix="audio-save")
+        return _save_pool
+
+LOG_PREVIEW_CHARS = 500 # Frames can carry megabytes of base64 audio; never log more than this
+
+def _log_frame(direction, frame):
+    """Debug-logs a WebSocket frame, truncated to LOG_PREVIEW_CHARS, with its full size."""
+    if logger.isEnabledFor(logging.DEBUG): # Skip slicing the frame when debug logging is off
+        preview = frame[:LOG_PREVIEW_CHARS]
+        if isinstance(preview, (bytes, bytearray, memoryview)): # Received and sent frames are bytes; log text, not a b'...' repr
+            preview = bytes(preview).decode('utf-8', 'replace')
+        logger.debug("%s[%d bytes]: %s%s", direction, len(frame), preview,
+                     "..." if len(frame) > LOG_PREVIEW_CHARS else "")
+
+# Large Base64 frames nothing in this client consumes; on_message drops them without parsing
+UNPARSED_TYPES = frozenset({"response.audio.delta"})
+# The server sends "type" as the first key, so a match on the frame's head identifies it.
+# Values with escapes do not match; such frames are simply parsed.
+_TYPE_PEEK = re.compile(r'\{\s*"type"\s*:\s*"([^"\\]+)"')
+
+def _peek_type(frame):
+    """
+    Returns the leading "type" value of a JSON frame without parsing it, or None
+    when "type" is not the first key or its value contains an escape.
+    """
+    head = frame[:64]
+    if isinstance(head, (bytes, bytearray)):
+        head = head.decode('ascii', 'replace')
+    match = _TYPE_PEEK.match(head)
+    return match.group(1) if match else None
 
 class OpenAIRealtimeClient:
     def __init__(self, url, headers):
@@ -36,110 +337,265 @@ class OpenAIRealtimeClient:
         self.global_event_id = None       # Stores event_id from session.created
         self.global_session_id = None     # Stores session.id from session.created/updated
         self.is_connected = False
-        
-        # Events for synchronization
-        self.connection_open_event = threading.Event()
-        self.session_created_event = threading.Event()
-        self.session_updated_event = threading.Event()
-        self.close_event = threading.Event() # For signaling final closure
 
         self._ws_thread = None # To hold the WebSocket thread
-        self.latest_received_message = None
+        self._inbox = collections.deque() # Received messages awaiting a consumer
+        self._inbox_overflowed = False # Set once the inbox first drops a message
+        # Guards connection/session state, the inbox and expectations shared with the receive thread.
+        # Reentrant so handlers can run under it; the conditions below share it for wait/notify.
+        self._state_lock = threading.RLock()
+        self._inbox_cond = threading.Condition(self._state_lock) # Notified on every new message
+        # Lifecycle synchronization: one bitmask of STATE_* flags and one condition, instead of an Event per state
+        self._state = 0
+        self._state_cond = threading.Condition(self._state_lock)
+        self._expectations = {} # Message type -> pending expectation registered by a sender
+        self.last_by_type = {} # Message type -> most recent message of that type; never overwritten by other types
+        self._pending_saves = set() # This client's background audio saves still in flight
+        self._created_dirs = set() # Output directories already made; skips a makedirs stat walk per save
+
+        # Message type -> handler, built once so on_message does a single dict lookup
+        self._handlers = {
+            "session.created": self._handle_session_created,
+            "session.updated": self._handle_session_updated
+        }
 
     def on_message(self, ws, message):
         """
         Callback function to handle incoming WebSocket messages.
+        message is bytes, not str: UTF-8 validation is skipped (see _run_websocket), so
+        websocket-client hands text frames over undecoded. The JSON decoder takes bytes directly.
         """
-        print("\n--- Received message ---")
-        print(message)
+        _log_frame("rx", message)
+
+        peeked_type = _peek_type(message)
+        # Skip building a dict tree around audio we would discard, unless a handler was registered for it
+        if peeked_type in UNPARSED_TYPES and peeked_type not in self._handlers:
+            logger.debug("recv %s (not parsed)", peeked_type)
+            return
 
         try:
-            data = json.loads(message)
-            self.latest_received_message = data  # <-- Add this line
+            data = _json_loads(message)
             msg_type = data.get("type")
-            
-            if msg_type == "session.created":
-                print("Processing 'session.created' event.")
-                expected_type = "session.created"
-                if data.get("type") == expected_type:
-                    print(f"Validation successful: 'type' is '{expected_type}'")
-                else:
-                    print(f"Validation failed: Expected 'type' to be '{expected_type}', but got '{data.get('type')}'")
+            handler = self._handlers.get(msg_type, self._handle_unhandled_message)
+            with self._state_lock:
+                self._push_received_message(data)
+                self.last_by_type[msg_type] = data
+                self._fulfil_expectation(msg_type, data)
+                handler(data)
 
-                event_id_from_msg = data.get("event_id")
-                if event_id_from_msg:
-                    self.global_event_id = event_id_from_msg
-                    print(f"Validation successful: 'event_id' is present and assigned to self.global_event_id: '{self.global_event_id}'")
-                else:
-                    print("Validation failed: 'event_id' is missing.")
+            # One structured line per event; payload fields (audio, deltas) never reach the log here
+            logger.debug("recv %s event_id=%s", msg_type, data.get("event_id"))
 
-                session_id_from_msg = data.get("session", {}).get("id")
-                if session_id_from_msg:
-                    self.global_session_id = session_id_from_msg
-                    print(f"Validation successful: 'session.id' is present and assigned to self.global_session_id: '{self.global_session_id}'")
-                else:
-                    print("Validation failed: 'session.id' is missing.")
-                
-                self.session_created_event.set() # Signal that session.created was received
-                
-            elif msg_type == "session.updated":
-                print("Processing 'session.updated' event.")
-                expected_type = "session.updated"
-                if data.get("type") == expected_type:
-                    print(f"Validation successful: 'type' is '{expected_type}'")
-                else:
-                    print(f"Validation failed: Expected 'type' to be '{expected_type}', but got '{data.get('type')}'")
+        except json.JSONDecodeError:
+            logger.error("Could not decode JSON from message.")
+        except Exception as e:
+            logger.error("An unexpected error occurred during message processing: %s", e)
 
-                event_id_from_msg = data.get("event_id")
-                if event_id_from_msg:
-                    print(f"Validation successful: 'event_id' is present: '{event_id_from_msg}'")
-                else:
-                    print("Validation failed: 'event_id' is missing for session.updated.")
-
-                session_id_from_msg = data.get("session", {}).get("id")
-                if session_id_from_msg:
-                    if self.global_session_id and self.global_session_id != session_id_from_msg:
-                        print(f"Warning: session.id in session.updated ({session_id_from_msg}) differs from initial session.id ({self.global_session_id})")
-                    else:
-                        print(f"Validation successful: 'session.id' is present and consistent: '{session_id_from_msg}'")
-                    self.global_session_id = session_id_from_msg 
+    def _handle_session_created(self, data):
+        """
+        Validates 'session.created' and captures the event_id and session.id.
+        """
+        logger.debug("Processing 'session.created' event.")
+        missing = _missing_fields("session.created", data)
+        if missing:
+            logger.warning("Validation failed: %s missing for session.created.", missing)
+
+        event_id_from_msg = data.get("event_id")
+        if event_id_from_msg:
+            self.global_event_id = event_id_from_msg
+        session_id_from_msg = data.get("session", {}).get("id")
+        if session_id_from_msg:
+            self.global_session_id = session_id_from_msg
+        
+        self._set_state(STATE_SESSION_CREATED) # Signal that session.created was received
+
+    def _handle_session_updated(self, data):
+        """
+        Validates 'session.updated' and checks the session.id is consistent.
+        """
+        logger.debug("Processing 'session.updated' event.")
+        missing = _missing_fields("session.updated", data)
+        if missing:
+            logger.warning("Validation failed: %s missing for session.updated.", missing)
+
+        session_id_from_msg = data.get("session", {}).get("id")
+        if session_id_from_msg:
+            if self.global_session_id and self.global_session_id != session_id_from_msg:
+                logger.warning("session.id in session.updated (%s) differs from initial session.id (%s)", session_id_from_msg, self.global_session_id)
+            self.global_session_id = session_id_from_msg 
+
+    def register_handler(self, msg_type, handler):
+        """
+        Routes received messages of msg_type to handler(data), replacing any handler already
+        registered for that type. Handlers run on the receive thread under the state lock, so
+        they should return quickly. Messages are still buffered for the send_*_validate methods,
+        and types in UNPARSED_TYPES are parsed again once a handler is registered for them.
+        """
+        with self._state_lock:
+            self._handlers[msg_type] = handler
+
+    def _handle_unhandled_message(self, data):
+        """
+        Fallback for message types without a dedicated handler.
+        """
+        logger.debug("Received unhandled message type: %s", data.get('type'))
+
+    def _push_received_message(self, data):
+        """
+        Buffers a parsed message for the send_*_validate consumers.
+        The inbox is bounded: when no consumer keeps up, the oldest message is
+        dropped so memory stays capped regardless of the server's send rate.
+        Most replies are handed over through expectations and never read from the inbox,
+        so overflow is routine in long sessions: it is warned about once, then debug-logged.
+        """
+        with self._inbox_cond:
+            if len(self._inbox) >= INBOX_MAXSIZE:
+                dropped = self._inbox.popleft()
+                if self._inbox_overflowed:
+                    logger.debug("Inbox full, dropping oldest message of type '%s'", dropped.get('type'))
                 else:
-                    print("Validation failed: 'session.id' is missing for session.updated.")
-                
-                self.session_updated_event.set() # Signal that session.updated was received
+                    self._inbox_overflowed = True
+                    logger.warning("Inbox full (%d messages), dropping the oldest; further drops are logged at debug level", INBOX_MAXSIZE)
+            self._inbox.append(data)
+            self._inbox_cond.notify_all() # Wake consumers immediately rather than on a poll tick
 
-            else:
-                print(f"Received unhandled message type: {msg_type}")
+    def _pop_received_message(self, timeout=None):
+        """
+        Returns the oldest buffered message, or None if the inbox is empty.
+        With a timeout, blocks up to that many seconds for a message to arrive.
+        """
+        with self._inbox_cond:
+            if timeout is not None and not self._inbox:
+                self._inbox_cond.wait_for(lambda: self._inbox, timeout=timeout)
+            return self._inbox.popleft() if self._inbox else None
 
-            print(f"\nCurrent self.global_event_id: {self.global_event_id}")
-            print(f"Current self.global_session_id: {self.global_session_id}\n")
+    def _wait_for_message_type(self, msg_type, timeout):
+        """
+        Waits up to timeout seconds for a message of msg_type, discarding any others.
+        Everything already buffered is drained in one pass under the lock before the
+        thread goes back to waiting. Returns the message, or None on timeout.
+        """
+        deadline = time.monotonic() + timeout
+        with self._inbox_cond:
+            while True:
+                while self._inbox:
+                    message = self._inbox.popleft()
+                    if message.get("type") == msg_type:
+                        return message
+                    logger.debug("Received message with type '%s', waiting for '%s'", message.get('type'), msg_type)
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return None
+                self._inbox_cond.wait(remaining)
+
+    def wait_for_event(self, msg_type, timeout=10):
+        """
+        Blocks until the next message of msg_type arrives, discarding other buffered messages.
+        Wakes as soon as the receive thread delivers it. Returns the message, or None on timeout.
+        """
+        return self._wait_for_message_type(msg_type, timeout)
 
-        except json.JSONDecodeError:
-            print("Error: Could not decode JSON from message.")
-        except Exception as e:
-            print(f"An unexpected error occurred during message processing: {e}")
+    def drain(self, timeout=0):
+        """
+        Removes and returns every buffered message, oldest first. If the inbox is empty,
+        waits up to timeout seconds for one to arrive; returns immediately otherwise.
+        """
+        with self._inbox_cond:
+            if timeout and not self._inbox:
+                self._inbox_cond.wait_for(lambda: self._inbox, timeout=timeout)
+            messages = list(self._inbox)
+            self._inbox.clear()
+        return messages
+
+    def get_last_message(self, msg_type):
+        """
+        Returns the most recent message of msg_type received on this connection, or None.
+        """
+        with self._state_lock:
+            return self.last_by_type.get(msg_type)
+
+    def _expect(self, msg_type):
+        """
+        Registers interest in a message type before the request is sent.
+        The receive thread fulfils it in on_message, so the reply is handed over
+        directly even if other messages arrive first.
+        """
+        expectation = {"event": threading.Event(), "message": None}
+        with self._state_lock:
+            self._expectations[msg_type] = expectation
+        return expectation
+
+    def _fulfil_expectation(self, msg_type, data):
+        """
+        Hands a received message to the sender waiting for its type, if any.
+        """
+        with self._state_lock:
+            expectation = self._expectations.pop(msg_type, None)
+        if expectation:
+            expectation["message"] = data
+            expectation["event"].set()
+
+    def _cancel_expectation(self, msg_type, expectation):
+        """
+        Withdraws an expectation whose request could not be sent. Only removes it if it is
+        still the one registered, so another thread's expectation for the type is left alone.
+        """
+        with self._state_lock:
+            if self._expectations.get(msg_type) is expectation:
+                del self._expectations[msg_type]
+
+    def _wait_for_expectation(self, expectation, timeout):
+        """
+        Blocks until the expected message arrives, the connection closes or the timeout elapses.
+        Returns the message, or None.
+        """
+        expectation["event"].wait(timeout=timeout)
+        return expectation["message"]
+
+    def _release_expectations(self):
+        """
+        Wakes every pending sender without a message (used when the connection ends).
+        """
+        with self._state_lock:
+            expectations = list(self._expectations.values())
+            self._expectations.clear()
+        for expectation in expectations:
+            expectation["event"].set()
+
+    def _set_state(self, flags):
+        """Marks the given STATE_* flags as reached and wakes every thread waiting on the state."""
+        with self._state_cond:
+            self._state |= flags
+            self._state_cond.notify_all()
+
+    def _wait_for_state(self, flags, timeout):
+        """
+        Blocks until any of the given STATE_* flags is set or the timeout elapses.
+        Returns the flags from the mask that were set, or 0 on timeout.
+        """
+        with self._state_cond:
+            self._state_cond.wait_for(lambda: self._state & flags, timeout=timeout)
+            return self._state & flags
 
     def on_error(self, ws, error):
         """
         Callback function to handle WebSocket errors.
         """
         print(f"Error: {error}")
-        self.is_connected = False
-        self.connection_open_event.set() # Unblock if waiting for connection
-        self.session_created_event.set() # Unblock if waiting for session.created
-        self.session_updated_event.set() # Unblock if waiting for session.updated
-        self.close_event.set() # Signal final closure on error
+        with self._state_lock:
+            self.is_connected = False
+        self._set_state(STATE_CLOSED) # Signal final closure on error; unblocks every state waiter
+        self._release_expectations() # Unblock any sender waiting for a reply
 
     def on_close(self, ws, close_status_code, close_msg):
         """
         Callback function when the WebSocket connection is closed.
         """
         print(f"Connection closed. Status code: {close_status_code}, Message: {close_msg}")
-        self.is_connected = False
-        self.connection_open_event.set() # Unblock if waiting for connection
-        self.session_created_event.set() # Unblock if waiting for session.created
-        self.session_updated_event.set() # Unblock if waiting for session.updated
-        self.close_event.set() # Signal final closure
+        with self._state_lock:
+            self.is_connected = False
+        self._set_state(STATE_CLOSED) # Signal final closure; unblocks every state waiter
+        self._release_expectations() # Unblock any sender waiting for a reply
         print(f"Final self.global_event_id at close: {self.global_event_id}")
         print(f"Final self.global_session_id at close: {self.global_session_id}")
 
@@ -148,21 +604,30 @@ class OpenAIRealtimeClient:
         Callback function when the WebSocket connection is opened.
         """
         print("Connection opened.")
-        self.is_connected = True
-        self.connection_open_event.set() # Signal that the connection is open
+        with self._state_lock:
+            self.is_connected = True
+        self._set_state(STATE_OPEN) # Signal that the connection is open
         print(f"Instance variables at open: event_id={self.global_event_id}, session_id={self.global_session_id}")
 
     def _run_websocket(self):
         """Internal method to run the WebSocket in a separate thread."""
-        self.ws.run_forever()
+        # websocket-client never offers permessage-deflate, so frames are already uncompressed;
+        # the UTF-8 walk over every text frame is redundant since the JSON decoder rejects bad input.
+        # Without it, text frames reach on_message as undecoded bytes, not str.
+        self.ws.run_forever(ping_interval=20, ping_timeout=10, skip_utf8_validation=True, sockopt=SOCKET_OPTIONS)
         print("WebSocket thread finished.")
 
     def connect_and_wait_for_session_created(self, timeout=10):
         """
         Establishes the WebSocket connection and waits for the session.created event.
         Returns True on success, False on failure or timeout.
+        Raises ValueError if OPENAI_API_KEY is not set.
         """
+        if not OPENAI_API_KEY:
+            raise ValueError("OPENAI_API_KEY environment variable not set. Please set it or replace the placeholder.")
         print(f"Attempting to connect to: {self.url}")
+        with self._state_lock:
+            self._state = 0 # A reconnect starts from scratch rather than seeing the last run's flags
         self.ws = websocket.WebSocketApp(
             self.url,
             header=self.headers,
@@ -178,13 +643,13 @@ class OpenAIRealtimeClient:
         self._ws_thread.start()
 
         print(f"Waiting for connection to open (timeout: {timeout}s)...")
-        if not self.connection_open_event.wait(timeout=timeout):
+        if not self._wait_for_state(STATE_OPEN | STATE_CLOSED, timeout):
             print("Error: Connection did not open in time.")
             self.close_connection()
             return False
 
         print(f"Waiting for 'session.created' event (timeout: {timeout}s)...")
-        if not self.session_created_event.wait(timeout=timeout):
+        if not self._wait_for_state(STATE_SESSION_CREATED | STATE_CLOSED, timeout):
             print("Error: 'session.created' event not received in time.")
             self.close_connection()
             return False
@@ -196,6 +661,53 @@ class OpenAIRealtimeClient:
         print("Successfully connected and received 'session.created'.")
         return True
 
+    def _send_text(self, payload):
+        """
+        Sends pre-encoded UTF-8 JSON bytes as a text frame. Passing bytes skips
+        websocket-client's own str.encode of the payload.
+        """
+        self.ws.send(payload, opcode=websocket.ABNF.OPCODE_TEXT)
+
+    def _send_texts(self, payloads):
+        """
+        Sends several pre-encoded text frames back to back. Where TCP_CORK exists (Linux)
+        the socket is corked for the burst, so the kernel packs the frames into full
+        segments instead of pushing one partial segment per send.
+        """
+        sock = getattr(self.ws.sock, "sock", None) if hasattr(socket, "TCP_CORK") else None
+        if sock is not None:
+            try:
+                sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 1)
+            except OSError:
+                sock = None
+        try:
+            for payload in payloads:
+                self._send_text(payload)
+        finally:
+            if sock is not None:
+                try:
+                    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_CORK, 0) # Uncorking flushes the tail
+                except OSError as e:
+                    logger.warning("Could not uncork socket: %s", e)
+
+    def send_batch(self, events):
+        """
+        Sends several client events back to back without waiting for any reply in between.
+        The Realtime API takes one event per frame, so they go out as consecutive frames
+        in a single corked burst. Returns True on success, False on failure.
+        """
+        if not self.is_connected:
+            print("Error: Not connected to WebSocket. Cannot send batch.")
+            return False
+
+        try:
+            self._send_texts([_json_dumps(event) for event in events])
+            print(f"\n--- Sent {len(events)} events in one burst ---")
+        except Exception as e:
+            print(f"Failed to send event batch: {e}")
+            return False
+        return True
+
     def send_session_update_and_wait_for_updated(self, timeout=10):
             """
             Constructs and sends the session.update event to the WebSocket,
@@ -206,37 +718,34 @@ class OpenAIRealtimeClient:
                 print("Error: Not connected to WebSocket. Cannot send update.")
                 return None
 
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            data_file_path = os.path.join(script_dir, '..', 'data', 'session_events', 'session_update.json')
+            # Register before sending so a fast reply cannot slip past us
+            expectation = self._expect("session.updated")
 
-            update_payload = {}
             try:
-                with open(data_file_path, 'r') as f:
-                    update_payload = json.load(f)
-                json_payload = json.dumps(update_payload)
-                self.ws.send(json_payload)
+                json_payload = _session_update_bytes()
+                self._send_text(json_payload)
                 print(f"\n--- Sent 'session.update' event ---")
-                print(json_payload)
+                _log_frame("tx", json_payload)
             except Exception as e:
                 print(f"Failed to send 'session.update' event: {e}")
+                self._cancel_expectation("session.updated", expectation)
                 return None
 
             print(f"Waiting for 'session.updated' event (timeout: {timeout}s)...")
-            if not self.session_updated_event.wait(timeout=timeout):
-                print("Error: 'session.updated' event not received in time.")
-                return None
-            if not self.is_connected:
-                print("Error: Connection closed after receiving 'session.updated'.")
+            # The receive thread hands over this request's session.updated itself
+            updated_message = self._wait_for_expectation(expectation, timeout)
+            if updated_message is None:
+                if not self.is_connected:
+                    print("Error: Connection closed before receiving 'session.updated'.")
+                else:
+                    print("Error: 'session.updated' event not received in time.")
                 return None
-            # Extract event_id from the latest received message
-            event_id = None
-            if hasattr(self, "latest_received_message") and self.latest_received_message:
-                event_id = self.latest_received_message.get("event_id")
+            event_id = updated_message.get("event_id")
             if event_id:
                 print(f"Successfully sent 'session.update' and received 'session.updated'. Event ID: {event_id}")
                 return event_id
             else:
-                print("session.updated received but event_id not found in latest_received_message.")
+                print("session.updated received but event_id not found in the message.")
                 return None
 
     def close_connection(self):
@@ -246,8 +755,8 @@ class OpenAIRealtimeClient:
         if self.ws and self.is_connected:
             print("Closing WebSocket connection...")
             self.ws.close()
-            # Wait for on_close to execute and set close_event
-            if not self.close_event.wait(timeout=5):
+            # Wait for on_close to execute and set STATE_CLOSED
+            if not self._wait_for_state(STATE_CLOSED, 5):
                 print("Warning: WebSocket close may not have completed gracefully.")
         elif self.ws:
             print("WebSocket already closed or not connected.")
@@ -259,120 +768,398 @@ class OpenAIRealtimeClient:
             self._ws_thread.join(timeout=5) # Wait for the thread to finish
             if self._ws_thread.is_alive():
                 print("Warning: WebSocket thread did not terminate gracefully.")
+        self.wait_for_saved_audio()
         print("Connection cleanup complete.")
 
-    def process_audio_to_base64(self, input_file, output_dir=None):
-    # ... (same code as before) ...
+    def __enter__(self):
+        """
+        Connects and waits for session.created, so one authenticated connection
+        can be shared by several flows: `with OpenAIRealtimeClient(URL, HEADERS) as client:`.
+        """
+        if not self.connect_and_wait_for_session_created():
+            raise ConnectionError("Could not connect to the Realtime API or receive 'session.created'.")
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close_connection()
+        return False
+
+    def reset_session(self, timeout=10):
+        """
+        Readies an open connection for the next flow instead of reconnecting:
+        drops messages and pending expectations left over from earlier flows, so a late
+        reply cannot fulfil a waiter in the next flow, and re-sends session.update.
+        Returns the session.updated event_id, or None on failure.
+        """
+        with self._inbox_cond:
+            self._inbox.clear()
+            self.last_by_type.clear()
+        self._release_expectations()
+        return self.send_session_update_and_wait_for_updated(timeout=timeout)
+
+    def _load_audio(self, input_file):
+        """
+        Decodes an audio file to a mono float32 array at TARGET_SAMPLE_RATE.
+        Reads through libsndfile and resamples with soxr; librosa is only used
+        for formats libsndfile cannot read, or to resample when soxr is missing.
+        Returns (audio, sample_rate).
+        """
         try:
-            # --- Step 1: Convert to PCM INT16 WAV in memory ---
-            audio, sr = librosa.load(input_file, sr=16000, mono=True)
-            base_filename = os.path.splitext(os.path.basename(input_file))[0]  
-            if output_dir:
-                os.makedirs(output_dir, exist_ok=True) 
-                output_pcm16_path = os.path.join(output_dir, f"{base_filename}_pcm16.wav")
-                output_base64_path = os.path.join(output_dir, f"{base_filename}_base64.txt")
+            audio, sr = sf.read(input_file, dtype='float32', always_2d=True)
+        except RuntimeError: # libsndfile cannot decode this format
+            return _librosa().load(input_file, sr=TARGET_SAMPLE_RATE, mono=True, res_type=_LIBROSA_RES_TYPE, dtype='float32')
+
+        audio = audio.mean(axis=1) if audio.shape[1] > 1 else audio[:, 0]
+        if sr != TARGET_SAMPLE_RATE:
+            if soxr:
+                audio = soxr.resample(audio, sr, TARGET_SAMPLE_RATE, quality=RESAMPLE_QUALITY)
             else:
-                input_dir = os.path.dirname(input_file) if os.path.dirname(input_file) else os.getcwd()
-                output_pcm16_path = os.path.join(input_dir, f"{base_filename}_pcm16.wav")
-                output_base64_path = os.path.join(input_dir, f"{base_filename}_base64.txt")
-            sf.write(output_pcm16_path, audio, sr, subtype='PCM_16')
-
-            # --- Step 2: Convert PCM16 WAV file to Base64 encoded string ---
-            with open(output_pcm16_path, 'rb') as file:
-                wav_bytes = file.read()
-                base64_encoded = base64.b64encode(wav_bytes).decode('utf-8')
-            # --- Step 3: Save Base64 to file (optional) ---
-            if output_dir: 
-                with open(output_base64_path, 'w') as f:
-                    f.write(base64_encoded)
-            return base64_encoded
+                audio = _librosa().resample(audio, orig_sr=sr, target_sr=TARGET_SAMPLE_RATE, res_type=_LIBROSA_RES_TYPE)
+                audio = audio.astype('float32', copy=False) # scipy's polyphase filter can promote to float64
+        return audio, TARGET_SAMPLE_RATE
+
+    def _read_pcm16_if_target_format(self, input_file):
+        """
+        Returns the samples of the file's data chunk if it is already a mono PCM16 WAV
+        at TARGET_SAMPLE_RATE, otherwise None. Only the header is inspected to decide.
+        """
+        try:
+            info = sf.info(input_file)
+        except RuntimeError: # Not something libsndfile can sniff; take the decode path
+            return None
+        if (info.format == 'WAV' and info.subtype == 'PCM_16'
+                and info.channels == 1 and info.samplerate == TARGET_SAMPLE_RATE):
+            with open(input_file, 'rb') as f:
+                # Map rather than read: the samples are encoded straight from the page cache, with
+                # no file-sized bytes copy. The returned view keeps the mapping alive until released.
+                return _wav_data_chunk(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+        return None
 
+    def _to_pcm16_bytes(self, input_file):
+        """
+        Converts an audio file to raw little-endian PCM16 samples, mono at
+        TARGET_SAMPLE_RATE, in memory (the CPU-bound stage). Files already in the
+        target format only have their samples sliced out, without a decode/re-encode.
+        """
+        pcm = self._read_pcm16_if_target_format(input_file)
+        if pcm is None:
+            audio, _ = self._load_audio(input_file)
+            # Scale, saturate and round in place with vectorized ufuncs, then narrow once;
+            # no round trip through libsndfile's virtual I/O into a BytesIO
+            np.multiply(audio, 32767.0, out=audio)
+            np.clip(audio, -32768.0, 32767.0, out=audio)
+            np.rint(audio, out=audio)
+            pcm = memoryview(audio.astype('<i2')).cast('B') # Byte view of the samples; no tobytes() copy
+        return pcm
+
+    def _stat_and_decode(self, input_file):
+        """
+        Returns (os.stat result, PCM16 samples) for input_file. The stat is taken before
+        decoding, so a file replaced mid-decode never gets the new file's stamp.
+        """
+        return os.stat(input_file), self._to_pcm16_bytes(input_file)
+
+    def _pcm16_to_base64(self, input_file, pcm, output_dir=None, source_stat=None):
+        """
+        Base64-encodes raw PCM16 samples and optionally saves them as a WAV,
+        plus the Base64 text, to output_dir. Returns the Base64 as ASCII bytes.
+        source_stat is the input's os.stat result from before decoding, recorded with the saved files.
+        """
+        base64_bytes = _b64encode(pcm)
+        if output_dir:
+            # The caller gets the Base64 back immediately; the files land in the background
+            future = _get_save_pool().submit(self._save_processed_audio, input_file, pcm, base64_bytes, output_dir, source_stat)
+            with self._state_lock:
+                self._pending_saves.add(future)
+            future.add_done_callback(self._on_save_done)
+        return base64_bytes
+
+    def _save_processed_audio(self, input_file, pcm, base64_bytes, output_dir, source_stat=None):
+        """
+        Writes the samples as a PCM16 WAV, and their Base64 text, next to each other in output_dir,
+        then the source stamp that lets a later run reuse them. Without source_stat no stamp is
+        written, so the files are never reused.
+        """
+        header = _pcm16_wav_header(len(pcm), TARGET_SAMPLE_RATE)
+        self._ensure_dir(output_dir)
+        output_pcm16_path, output_base64_path, stamp_path = self._processed_audio_paths(input_file, output_dir)
+        try:
+            os.remove(stamp_path) # An interrupted save must not leave the old stamp vouching for new files
         except FileNotFoundError:
-                print(f"Error: Input file not found at {input_file}")
-                return None
+            pass
+        try:
+            _write_file(output_pcm16_path, header, pcm)
+        except FileNotFoundError: # Directory removed since it was cached; recreate once
+            self._created_dirs.discard(output_dir)
+            self._ensure_dir(output_dir)
+            _write_file(output_pcm16_path, header, pcm)
+        _write_file(output_base64_path, base64_bytes) # Already ASCII bytes; no text-layer re-encode
+        if source_stat is not None:
+            _write_file(stamp_path, _source_stamp(source_stat)) # Written last: present only once both files are
+
+    def _processed_audio_paths(self, input_file, output_dir):
+        """
+        Returns the (PCM16 WAV, Base64 text, source stamp) paths the processed files of input_file are saved to.
+        """
+        base_filename = os.path.splitext(os.path.basename(input_file))[0]
+        return (os.path.join(output_dir, f"{base_filename}_pcm16.wav"),
+                os.path.join(output_dir, f"{base_filename}_base64.txt"),
+                os.path.join(output_dir, f"{base_filename}_source.txt"))
+
+    def _read_saved_audio_base64(self, input_file, output_dir):
+        """
+        Returns the Base64 text saved for input_file in output_dir, or None if it is empty
+        or cannot be read (e.g. removed since it was checked), so the caller converts instead.
+        """
+        try:
+            with open(self._processed_audio_paths(input_file, output_dir)[1], 'rb') as f:
+                base64_bytes = f.read()
+        except OSError as e:
+            logger.debug("Could not read saved Base64 for %s: %s", input_file, e)
+            return None
+        return base64_bytes or None
+
+    def _saved_audio_is_current(self, input_file, output_dir, source_stat):
+        """
+        True if the processed files in output_dir exist and were saved from a source with
+        source_stat's mtime and size. Comparing the recorded stamp, rather than file ages,
+        also catches a source replaced by an older file, copied with cp -p or checked out.
+        """
+        self.wait_for_saved_audio() # Never trust a file a background save is still writing
+        output_pcm16_path, output_base64_path, stamp_path = self._processed_audio_paths(input_file, output_dir)
+        try:
+            with open(stamp_path, 'rb') as f:
+                if f.read() != _source_stamp(source_stat):
+                    return False
+            return os.path.isfile(output_pcm16_path) and os.path.isfile(output_base64_path)
+        except OSError:
+            return False
+
+    def _ensure_dir(self, path):
+        """Creates path (and parents) the first time it is seen by this client."""
+        if path not in self._created_dirs:
+            os.makedirs(path, exist_ok=True)
+            self._created_dirs.add(path)
+
+    def _on_save_done(self, future):
+        with self._state_lock:
+            self._pending_saves.discard(future)
+        error = future.exception()
+        if error:
+            print(f"Failed to save processed audio files: {error}")
+
+    def wait_for_saved_audio(self, timeout=None):
+        """
+        Blocks until every background save of processed audio has finished.
+        Returns True if none are still pending.
+        """
+        with self._state_lock:
+            pending = list(self._pending_saves)
+        _, not_done = concurrent.futures.wait(pending, timeout=timeout)
+        return not not_done
+
+    def _report_audio_error(self, input_file, error):
+        if isinstance(error, FileNotFoundError):
+            print(f"Error: Input file not found at {input_file}")
+        else:
+            print(f"An unexpected error occurred during audio processing: {str(error)}")
+
+    def process_audio_to_base64(self, input_file, output_dir=None, as_bytes=False):
+    # ... (same code as before) ...
+        # as_bytes=True returns the ASCII bytes as encoded; send_audio_buffer_and_validate_speech_started
+        # takes them as-is, so neither side pays for a str decode/encode of the whole clip
+        try:
+            # --- Step 1: Convert to raw PCM INT16 in memory ---
+            # input_audio_buffer.append takes bare pcm16 samples, so no WAV header is sent
+            source_stat, pcm = self._stat_and_decode(input_file)
+            # --- Steps 2-3: Base64-encode, and save PCM16 WAV and Base64 to files (optional) ---
+            base64_bytes = self._pcm16_to_base64(input_file, pcm, output_dir, source_stat)
+            return base64_bytes if as_bytes else base64_bytes.decode('ascii')
         except Exception as e:
-                print(f"An unexpected error occurred during audio processing: {str(e)}")
-                return None
+            self._report_audio_error(input_file, e)
+            return None
+
+    def batch_process_audio(self, audio_filenames, output_dir=None, as_bytes=False):
+        """
+        Converts several files from data/audio to Base64 raw PCM16, in order.
+
+        Decoding runs on a worker thread up to BATCH_DECODE_AHEAD files ahead while
+        this thread encodes (and optionally saves) the previous one, so the two stages
+        overlap instead of running back to back. libsndfile and soxr release the GIL
+        while they work.
+
+        Returns a list with one Base64 string (bytes with as_bytes) per filename, or None where a file failed.
+        """
+        paths = iter([os.path.join(AUDIO_DATA_DIR, name) for name in audio_filenames])
+        results = []
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=1) as decoder:
+            pending = collections.deque()
+            for path in paths:
+                pending.append((path, decoder.submit(self._stat_and_decode, path)))
+                if len(pending) >= BATCH_DECODE_AHEAD:
+                    break
+
+            while pending:
+                path, future = pending.popleft()
+                next_path = next(paths, None)
+                if next_path is not None: # Keep the decoder busy while this file is encoded
+                    pending.append((next_path, decoder.submit(self._stat_and_decode, next_path)))
+                try:
+                    source_stat, pcm = future.result()
+                    base64_bytes = self._pcm16_to_base64(path, pcm, output_dir, source_stat)
+                    results.append(base64_bytes if as_bytes else base64_bytes.decode('ascii'))
+                except Exception as e:
+                    self._report_audio_error(path, e)
+                    results.append(None)
+
+        return results
 
 # --- Existing function: get_audio_base64_from_data_folder ---
-    def get_audio_base64_from_data_folder(self, audio_filename, save_processed_files=False):
-        # ... (same code as before) ...
-        project_root = os.getcwd()
-        data_folder_path = os.path.join(project_root, "data", "audio")
-        input_audio_path = os.path.join(data_folder_path, audio_filename)
+    def get_audio_base64_from_data_folder(self, audio_filename, save_processed_files=False, as_bytes=False):
+        """
+        Returns the Base64 raw PCM16 samples for a file in data/audio, or None on failure.
+        With as_bytes the ASCII bytes are returned without decoding them to str.
+
+        Results are cached in memory per (path, mtime, size), so editing or replacing the file
+        invalidates its entry. The cache also serves save_processed_files=True calls, but only
+        while the processed files in data/audio/audio exist and were saved from a source with
+        the same mtime and size, as recorded in their _source.txt stamp. Saved Base64 is also
+        reused across runs on the same terms; otherwise the audio is converted and the files
+        are saved again (in the background; see wait_for_saved_audio).
+        """
+        input_audio_path = os.path.join(AUDIO_DATA_DIR, audio_filename)
 
         output_sub_dir = None
         if save_processed_files:
-            output_sub_dir = os.path.join(data_folder_path, "audio")
-            os.makedirs(output_sub_dir, exist_ok=True) 
-
-        base64_string = self.process_audio_to_base64(input_audio_path, output_dir=output_sub_dir if save_processed_files else None)
+            output_sub_dir = os.path.join(AUDIO_DATA_DIR, "audio")
+        base64_bytes = self._get_cached_audio_base64(input_audio_path, output_dir=output_sub_dir)
         
-        if base64_string:
+        if base64_bytes:
             print(f"Successfully obtained Base64 for {audio_filename}.")
         else:
             print(f"Failed to obtain Base64 for {audio_filename}.")
-        return base64_string
+            return None
+        return base64_bytes if as_bytes else base64_bytes.decode('ascii')
 
 
-    def send_audio_buffer_and_validate_speech_started(self, event_id, audio_data_base64):    
+    def _get_cached_audio_base64(self, input_audio_path, output_dir=None):
         """
-        Constructs and sends an 'input_audio_buffer.append' event to the WebSocket.
-        Immediately attempts to validate the last received message as 'speech_started'
+        Returns process_audio_to_base64 bytes from the cache, converting on a miss. Failures are not cached.
+        With output_dir, a result only counts as cached once its processed files there are current;
+        a Base64 file saved by an earlier run from the same source is read back instead of converting again.
+        """
+        try:
+            st = os.stat(input_audio_path)
+        except FileNotFoundError as e:
+            # Report it here; the decoders (and the librosa import) would only fail on it again
+            self._report_audio_error(input_audio_path, e)
+            return None
+        except OSError:
+            # Let the usual error path report it
+            return self.process_audio_to_base64(input_audio_path, output_dir=output_dir, as_bytes=True)
+        key = (os.path.abspath(input_audio_path), st.st_mtime_ns, st.st_size)
+        saved_is_current = output_dir is None or self._saved_audio_is_current(input_audio_path, output_dir, st)
+
+        base64_bytes = _audio_base64_cache.get(key)
+        if base64_bytes is not None and saved_is_current:
+            _audio_base64_cache.move_to_end(key)
+            return base64_bytes
+
+        base64_bytes = None
+        if output_dir and saved_is_current:
+            base64_bytes = self._read_saved_audio_base64(input_audio_path, output_dir)
+        if base64_bytes is None: # Nothing usable saved; convert (and save) afresh
+            base64_bytes = self.process_audio_to_base64(input_audio_path, output_dir=output_dir, as_bytes=True)
+        if base64_bytes:
+            _audio_base64_cache[key] = base64_bytes
+            if len(_audio_base64_cache) > AUDIO_CACHE_MAXSIZE:
+                _audio_base64_cache.popitem(last=False)
+        return base64_bytes
+
+    def send_audio_buffer_and_validate_speech_started(self, event_id, audio_data_base64, timeout=10):    
+        """
+        Sends the audio as a series of 'input_audio_buffer.append' events of at most
+        APPEND_CHUNK_CHARS each, so the server can start on the audio while the rest uploads.
+        Waits for the 'speech_started' response captured by the receive thread, validates it
         and stores key data globally and in the instance.
 
-        Returns True on success, False on failure.
+        Returns True on success, False on failure or timeout.
+        """
+        audio_bytes = audio_data_base64 if isinstance(audio_data_base64, bytes) else audio_data_base64.encode('ascii')
+        audio_view = memoryview(audio_bytes)
+        chunks = (audio_view[offset:offset + APPEND_CHUNK_CHARS] for offset in range(0, max(len(audio_view), 1), APPEND_CHUNK_CHARS))
+        return self._append_and_validate_speech_started(event_id, chunks, timeout)
+
+    def stream_audio_and_validate_speech_started(self, event_id, audio_filename, timeout=10):
+        """
+        Like send_audio_buffer_and_validate_speech_started, but takes a file in data/audio and
+        Base64-encodes it one append chunk at a time as it sends, so the first frame leaves
+        without waiting for the whole clip to be encoded and no full Base64 copy is ever held.
+
+        Returns True on success, False on failure or timeout.
         """
         if not self.is_connected:
             print("Error: Not connected to WebSocket. Cannot send audio buffer.")
             return False
 
-        request_body = {
-            "event_id": event_id,
-            "type": "input_audio_buffer.append",
-            "audio": audio_data_base64
-        }
+        input_audio_path = os.path.join(AUDIO_DATA_DIR, audio_filename)
+        try:
+            pcm = memoryview(self._to_pcm16_bytes(input_audio_path)).cast('B')
+        except Exception as e:
+            self._report_audio_error(input_audio_path, e)
+            return False
+
+        pcm_chunk = APPEND_CHUNK_CHARS // 4 * 3 # Raw bytes that encode to exactly one chunk
+        chunks = (_b64encode(pcm[offset:offset + pcm_chunk]) for offset in range(0, max(len(pcm), 1), pcm_chunk))
+        return self._append_and_validate_speech_started(event_id, chunks, timeout)
+
+    def _append_and_validate_speech_started(self, event_id, audio_chunks, timeout):
+        """
+        Sends each Base64 chunk as an 'input_audio_buffer.append' event in one burst, then waits
+        for and validates 'input_audio_buffer.speech_started'. Returns True on success.
+        """
+        if not self.is_connected:
+            print("Error: Not connected to WebSocket. Cannot send audio buffer.")
+            return False
+
+        # Register before sending so a fast reply cannot slip past us
+        expectation = self._expect("input_audio_buffer.speech_started")
 
         try:
-            json_payload = json.dumps(request_body)
-            self.ws.send(json_payload)
-            print(f"\n--- Sent 'input_audio_buffer.append' event ---")
-            # For display, truncate the audio data
-            display_payload = request_body.copy()
-            display_payload["audio"] = display_payload["audio"][:100] + "..." if len(display_payload["audio"]) > 100 else display_payload["audio"]
-            print(json.dumps(display_payload, indent=2))
+            sent = [0, 0] # Chunks and Base64 bytes sent
+            def frames():
+                for index, chunk in enumerate(audio_chunks):
+                    if index == 0 and logger.isEnabledFor(logging.DEBUG):
+                        # Log the fields directly: a 100-byte view of the audio, no payload copy or re-serialization
+                        logger.debug("sending append event_id=%s audio=%s...", event_id, bytes(chunk[:100]).decode('ascii'))
+                    sent[0] += 1
+                    sent[1] += len(chunk)
+                    # Splice into a fixed envelope: base64 needs no JSON escaping, so the
+                    # (large) audio skips the encoder's escape scan.
+                    # The first chunk carries the caller's event_id; the rest get a numbered suffix
+                    yield b''.join((
+                        f'{{"event_id":{_json_encode(event_id if index == 0 else f"{event_id}_{index}")},"type":"input_audio_buffer.append","audio":"'.encode(),
+                        chunk,
+                        b'"}'
+                    ))
+            self._send_texts(frames())
+            print(f"\n--- Sent 'input_audio_buffer.append' event ({sent[0]} chunk(s)) ---")
+            logger.debug("sent append event_id=%s audio[%d bytes]", event_id, sent[1])
         except Exception as e:
             print(f"Failed to send 'input_audio_buffer.append' event: {e}")
+            self._cancel_expectation("input_audio_buffer.speech_started", expectation)
             return False
 
-        # Directly attempt to validate the 'latest_received_message'
-        if self.latest_received_message and self.latest_received_message.get("type") == "input_audio_buffer.speech_started":
-            response_data = self.latest_received_message
-            self.latest_received_message = None # Clear after processing
+        # The receive thread hands over the matching message as soon as it arrives
+        response_data = self._wait_for_expectation(expectation, timeout)
+        if response_data:
 
             print("Processing 'input_audio_buffer.speech_started' event.")
-            expected_type = "input_audio_buffer.speech_started"
-            # Validate 'type'
-            if response_data.get("type") == expected_type:
-                print(f"Validation successful: 'type' is '{expected_type}'")
-            else:
-                print(f"Validation failed: Expected 'type' to be '{expected_type}', but got '{response_data.get('type')}'")
-                return False
-
-            # Validate 'event_id'
-            event_id_from_msg = response_data.get("event_id")
-            if event_id_from_msg:
-                print(f"Validation successful: 'event_id' is present: '{event_id_from_msg}'")
-            else:
-                print("Validation failed: 'event_id' is missing for input_audio_buffer.speech_started.")
-                return False
-
-            # Validate 'item_id'
-            item_id_from_msg = response_data.get("item_id")
-            if item_id_from_msg:
-                print(f"Validation successful: 'item_id' is present: '{item_id_from_msg}'")
-            else:
-                print("Validation failed: 'item_id' is missing for input_audio_buffer.speech_started.")
+            # The expectation was keyed on the type, so only the payload fields need checking
+            missing = _missing_fields("input_audio_buffer.speech_started", response_data)
+            if missing:
+                print(f"Validation failed: {missing} missing for input_audio_buffer.speech_started.")
                 return False
 
             # Store in global variables
@@ -413,71 +1200,39 @@ class OpenAIRealtimeClient:
             print("Error: Not connected to WebSocket. Cannot send commit.")
             return None
 
-        commit_payload = {
-            "event_id": event_id,
-            "type": "input_audio_buffer.commit"
-        }
-
         try:
-            self.ws.send(json.dumps(commit_payload))
+            json_payload = f'{{"event_id":{_json_encode(event_id)},"type":"input_audio_buffer.commit"}}'.encode()
+            self._send_text(json_payload)
             print("\n--- Sent 'input_audio_buffer.commit' event ---")
-            print(json.dumps(commit_payload, indent=2))
+            _log_frame("tx", json_payload)
         except Exception as e:
             print(f"Failed to send 'input_audio_buffer.commit' event: {e}")
             return None
 
         # Prepare to collect responses
-        responses = {
-            "input_audio_buffer.committed": {},
-            "conversation.item.created": {},
-            "conversation.item.input_audio_transcription.delta": {},
-            "conversation.item.input_audio_transcription.completed": {}
-        }
-        received_types = set()
-        transcript = ""
-        start_time = time.time()
-
-        while len(received_types) < 4 and (time.time() - start_time) < timeout:
-            if self.latest_received_message:
-                msg = self.latest_received_message
-                msg_type = msg.get("type")
-                self.latest_received_message = None  # Clear for next
-
-                if msg_type in responses:
-                    print(f"Processing '{msg_type}' event.")
-                    responses[msg_type]["event_id"] = msg.get("event_id")
-                    responses[msg_type]["item_id"] = msg.get("item_id") or msg.get("item", {}).get("id")
-                    responses[msg_type]["type"] = msg_type
-
-                    # For delta/completed, capture transcript
-                    if msg_type == "conversation.item.input_audio_transcription.delta":
-                        delta = msg.get("delta")
-                        if delta:
-                            transcript += delta
-                        responses[msg_type]["transcript"] = transcript
-                        print(f"Delta transcript: {delta}")
-                    elif msg_type == "conversation.item.input_audio_transcription.completed":
-                        responses[msg_type]["transcript"] = msg.get("transcript")
-                        print(f"Final transcript: {msg.get('transcript')}")
-                    elif msg_type == "conversation.item.created":
-                        # transcript may be null here
-                        content = msg.get("item", {}).get("content", [])
-                        if content and isinstance(content, list):
-                            responses[msg_type]["transcript"] = content[0].get("transcript")
-                    received_types.add(msg_type)
-                    print(f"Validation successful: '{msg_type}' received with event_id: '{responses[msg_type]['event_id']}', item_id: '{responses[msg_type]['item_id']}'")
-                else:
-                    print(f"Received unhandled message type: {msg_type}")
-
-            else:
-                time.sleep(0.1)  # Wait briefly for next message
-
+        # Entries start with their full key set so filling them in never resizes the dict
+        acc = _CommitAccumulator()
+        responses = acc.responses
+        received_types = acc.received_types
+        deadline = time.monotonic() + timeout
+
+        while len(received_types) < len(_COMMIT_EXPECTED_TYPES):
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            # Block on the inbox so we wake as soon as the next message arrives
+            msg = self._pop_received_message(timeout=remaining)
+            if msg and acc.record(msg):
+                # Nothing else follows the end of transcription, so stop instead of waiting out the timeout for missing deltas
+                break
+
+        acc.finish()
 
         # Store for later use
         self.commit_response_data = responses
-        print("\n--- Commit Response Summary ---")
-        for k, v in responses.items():
-            print(f"{k}: {v}")
+        # Each event was already reported as it arrived; the full summary is debug detail
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Commit response summary:\n%s", "\n".join(f"{k}: {v}" for k, v in responses.items()))
 
         return responses
     
@@ -495,53 +1250,42 @@ class OpenAIRealtimeClient:
             print("Error: Not connected to WebSocket. Cannot send clear command.")
             return None
 
-        clear_payload = {
-            "event_id": event_id,
-            "type": "input_audio_buffer.clear"
-        }
+        # Register before sending; the reply is handed over directly, so concurrent requests
+        # on other threads cannot consume it
+        expectation = self._expect("input_audio_buffer.cleared")
 
         try:
-            json_payload = json.dumps(clear_payload)
-            self.ws.send(json_payload)
+            json_payload = f'{{"event_id":{_json_encode(event_id)},"type":"input_audio_buffer.clear"}}'.encode()
+            self._send_text(json_payload)
             print("\n--- Sent 'input_audio_buffer.clear' event ---")
-            print(json_payload)
+            _log_frame("tx", json_payload)
         except Exception as e:
             print(f"Failed to send 'input_audio_buffer.clear' event: {e}")
+            self._cancel_expectation("input_audio_buffer.cleared", expectation)
             return None
 
         # Wait for and validate response
-        start_time = time.time()
-        while (time.time() - start_time) < timeout:
-            if self.latest_received_message:
-                response_data = self.latest_received_message
-                self.latest_received_message = None  # Clear after processing
-                
-                if response_data.get("type") == "input_audio_buffer.cleared":
-                    print("Processing 'input_audio_buffer.cleared' event.")
-                    
-                    # Validate event_id
-                    response_event_id = response_data.get("event_id")
-                    if response_event_id:
-                        print(f"Validation successful: 'event_id' is present: '{response_event_id}'")
-                    else:
-                        print("Validation failed: 'event_id' is missing.")
-                        return None
-                    
-                    # Store the response data
-                    self.buffer_cleared_response = response_data
-                    
-                    print(f"Successfully received and validated 'input_audio_buffer.cleared'")
-                    return {
-                        "type": response_data.get("type"),
-                        "event_id": response_event_id
-                    }
-                else:
-                    print(f"Received message with type '{response_data.get('type')}', waiting for 'input_audio_buffer.cleared'")
-            
-            time.sleep(0.1)  # Short delay between checks
+        response_data = self._wait_for_expectation(expectation, timeout)
+        if response_data is None:
+            print(f"Error: Did not receive 'input_audio_buffer.cleared' response within {timeout} seconds")
+            return None
+
+        print("Processing 'input_audio_buffer.cleared' event.")
         
-        print(f"Error: Did not receive 'input_audio_buffer.cleared' response within {timeout} seconds")
-        return None
+        missing = _missing_fields("input_audio_buffer.cleared", response_data)
+        if missing:
+            print(f"Validation failed: {missing} missing for input_audio_buffer.cleared.")
+            return None
+        response_event_id = response_data["event_id"]
+        
+        # Store the response data
+        self.buffer_cleared_response = response_data
+        
+        print(f"Successfully received and validated 'input_audio_buffer.cleared'")
+        return {
+            "type": response_data.get("type"),
+            "event_id": response_event_id
+        }
     
     def send_conversation_item_retrieve_and_validate(self, event_id, item_id, timeout=10):
         """
@@ -559,90 +1303,74 @@ class OpenAIRealtimeClient:
             print("Error: Not connected to WebSocket. Cannot retrieve item.")
             return None
 
-        retrieve_payload = {
-            "event_id": event_id,
-            "type": "conversation.item.retrieve",
-            "item_id": item_id
-        }
+        # Register before sending so a fast reply cannot slip past us
+        expectation = self._expect("conversation.item.retrieved")
 
         try:
-            json_payload = json.dumps(retrieve_payload)
-            self.ws.send(json_payload)
+            json_payload = f'{{"event_id":{_json_encode(event_id)},"type":"conversation.item.retrieve","item_id":{_json_encode(item_id)}}}'.encode()
+            self._send_text(json_payload)
             print("\n--- Sent 'conversation.item.retrieve' event ---")
-            print(json_payload)
+            _log_frame("tx", json_payload)
         except Exception as e:
             print(f"Failed to send 'conversation.item.retrieve' event: {e}")
+            self._cancel_expectation("conversation.item.retrieved", expectation)
             return None
 
         # Wait for and validate response
-        start_time = time.time()
-        while (time.time() - start_time) < timeout:
-            if self.latest_received_message:
-                response_data = self.latest_received_message
-                self.latest_received_message = None  # Clear after processing
-                
-                if response_data.get("type") == "conversation.item.retrieved":
-                    print("Processing 'conversation.item.retrieved' event.")
-                    
-                    # Validate event_id
-                    response_event_id = response_data.get("event_id")
-                    if response_event_id:
-                        print(f"Validation successful: 'event_id' is present: '{response_event_id}'")
-                    else:
-                        print("Validation failed: 'event_id' is missing.")
-                        return None
-                    
-                    # Validate item and item_id
-                    item = response_data.get("item", {})
-                    response_item_id = item.get("id")
-                    if response_item_id:
-                        if response_item_id == item_id:
-                            print(f"Validation successful: Item ID matches: '{response_item_id}'")
-                        else:
-                            print(f"Validation failed: Item ID mismatch. Expected '{item_id}', got '{response_item_id}'")
-                            return None
-                    else:
-                        print("Validation failed: Item ID is missing in response.")
-                        return None
-                    
-                    # Extract transcript and audio if present
-                    content = item.get("content", [])
-                    transcript = None
-                    audio_data = None
-                    audio_format = None
-                    
-                    if content and len(content) > 0:
-                        for content_item in content:
-                            if content_item.get("type") == "input_audio":
-                                transcript = content_item.get("transcript")
-                                audio_data = content_item.get("audio")
-                                audio_format = content_item.get("format")
-                                break
-                    
-                    # Store the response data
-                    self.item_retrieved_response = response_data
-                    
-                    result = {
-                        "type": response_data.get("type"),
-                        "event_id": response_event_id,
-                        "item_id": response_item_id,
-                        "transcript": transcript,
-                        "has_audio": audio_data is not None,
-                        "audio_format": audio_format
-                    }
-                    
-                    print(f"Successfully received and validated 'conversation.item.retrieved'")
-                    print(f"Transcript: {transcript[:100]}..." if transcript and len(transcript) > 100 else f"Transcript: {transcript}")
-                    print(f"Audio data: {'Present' if audio_data else 'Not present'}")
-                    
-                    return result
-                else:
-                    print(f"Received message with type '{response_data.get('type')}', waiting for 'conversation.item.retrieved'")
-            
-            time.sleep(0.1)  # Short delay between checks
+        response_data = self._wait_for_expectation(expectation, timeout)
+        if response_data is None:
+            print(f"Error: Did not receive 'conversation.item.retrieved' response within {timeout} seconds")
+            return None
+
+        print("Processing 'conversation.item.retrieved' event.")
         
-        print(f"Error: Did not receive 'conversation.item.retrieved' response within {timeout} seconds")
-        return None
+        missing = _missing_fields("conversation.item.retrieved", response_data)
+        if missing:
+            print(f"Validation failed: {missing} missing for conversation.item.retrieved.")
+            return None
+        response_event_id = response_data["event_id"]
+        
+        # Validate item_id
+        item = response_data["item"]
+        response_item_id = item.get("id")
+        if not response_item_id:
+            print("Validation failed: Item ID is missing in response.")
+            return None
+        if response_item_id != item_id:
+            print(f"Validation failed: Item ID mismatch. Expected '{item_id}', got '{response_item_id}'")
+            return None
+        
+        # Extract transcript and audio if present
+        content = item.get("content", [])
+        transcript = None
+        audio_data = None
+        audio_format = None
+        
+        if content and len(content) > 0:
+            for content_item in content:
+                if content_item.get("type") == "input_audio":
+                    transcript = content_item.get("transcript")
+                    audio_data = content_item.get("audio")
+                    audio_format = content_item.get("format")
+                    break
+        
+        # Store the response data
+        self.item_retrieved_response = response_data
+        
+        result = {
+            "type": response_data.get("type"),
+            "event_id": response_event_id,
+            "item_id": response_item_id,
+            "transcript": transcript,
+            "has_audio": audio_data is not None,
+            "audio_format": audio_format
+        }
+        
+        print(f"Successfully received and validated 'conversation.item.retrieved'")
+        print(f"Transcript: {transcript[:100]}..." if transcript and len(transcript) > 100 else f"Transcript: {transcript}")
+        print(f"Audio data: {'Present' if audio_data else 'Not present'}")
+        
+        return result
 
     def send_conversation_item_delete_and_validate(self, event_id, item_id, timeout=10):
         """
@@ -660,67 +1388,48 @@ class OpenAIRealtimeClient:
             print("Error: Not connected to WebSocket. Cannot delete item.")
             return None
 
-        delete_payload = {
-            "event_id": event_id,
-            "type": "conversation.item.delete",
-            "item_id": item_id
-        }
+        # Register before sending so a fast reply cannot slip past us
+        expectation = self._expect("conversation.item.deleted")
 
         try:
-            json_payload = json.dumps(delete_payload)
-            self.ws.send(json_payload)
+            json_payload = f'{{"event_id":{_json_encode(event_id)},"type":"conversation.item.delete","item_id":{_json_encode(item_id)}}}'.encode()
+            self._send_text(json_payload)
             print("\n--- Sent 'conversation.item.delete' event ---")
-            print(json_payload)
+            _log_frame("tx", json_payload)
         except Exception as e:
             print(f"Failed to send 'conversation.item.delete' event: {e}")
+            self._cancel_expectation("conversation.item.deleted", expectation)
             return None
 
         # Wait for and validate response
-        start_time = time.time()
-        while (time.time() - start_time) < timeout:
-            if self.latest_received_message:
-                response_data = self.latest_received_message
-                self.latest_received_message = None  # Clear after processing
-                
-                if response_data.get("type") == "conversation.item.deleted":
-                    print("Processing 'conversation.item.deleted' event.")
-                    
-                    # Validate event_id
-                    response_event_id = response_data.get("event_id")
-                    if response_event_id:
-                        print(f"Validation successful: 'event_id' is present: '{response_event_id}'")
-                    else:
-                        print("Validation failed: 'event_id' is missing.")
-                        return None
-                    
-                    # Validate item_id
-                    response_item_id = response_data.get("item_id")
-                    if response_item_id:
-                        if response_item_id == item_id:
-                            print(f"Validation successful: Item ID matches: '{response_item_id}'")
-                        else:
-                            print(f"Validation failed: Item ID mismatch. Expected '{item_id}', got '{response_item_id}'")
-                            return None
-                    else:
-                        print("Validation failed: Item ID is missing in response.")
-                        return None
-                    
-                    # Store the response data
-                    self.item_deleted_response = response_data
-                    
-                    print(f"Successfully received and validated 'conversation.item.deleted'")
-                    return {
-                        "type": response_data.get("type"),
-                        "event_id": response_event_id,
-                        "item_id": response_item_id
-                    }
-                else:
-                    print(f"Received message with type '{response_data.get('type')}', waiting for 'conversation.item.deleted'")
-            
-            time.sleep(0.1)  # Short delay between checks
+        response_data = self._wait_for_expectation(expectation, timeout)
+        if response_data is None:
+            print(f"Error: Did not receive 'conversation.item.deleted' response within {timeout} seconds")
+            return None
+
+        print("Processing 'conversation.item.deleted' event.")
         
-        print(f"Error: Did not receive 'conversation.item.deleted' response within {timeout} seconds")
-        return None
+        missing = _missing_fields("conversation.item.deleted", response_data)
+        if missing:
+            print(f"Validation failed: {missing} missing for conversation.item.deleted.")
+            return None
+        response_event_id = response_data["event_id"]
+        
+        # Validate item_id
+        response_item_id = response_data["item_id"]
+        if response_item_id != item_id:
+            print(f"Validation failed: Item ID mismatch. Expected '{item_id}', got '{response_item_id}'")
+            return None
+        
+        # Store the response data
+        self.item_deleted_response = response_data
+        
+        print(f"Successfully received and validated 'conversation.item.deleted'")
+        return {
+            "type": response_data.get("type"),
+            "event_id": response_event_id,
+            "item_id": response_item_id
+        }
 
 # Example of how you might run it directly (for testing without pytest)
 if __name__ == "__main__":
@@ -0,0 +1,40 @@
+# conftest.py
+import pytest
+import sys
+import os
+import itertools
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from src.openai_client import OpenAIRealtimeClient, URL, HEADERS, OPENAI_API_KEY
+
+# One client for the whole test session, so the TCP/TLS/WebSocket handshake and
+# session.created round trip are paid once rather than once per test module
+@pytest.fixture(scope="session")
+def openai_realtime_client():
+    """
+    Fixture to provide a connected OpenAIRealtimeClient shared by every test.
+    Tests call client.reset_session() to start from a clean session.
+    Ensures the connection is closed after the whole test session is done.
+    """
+    if not OPENAI_API_KEY:
+        pytest.skip("OPENAI_API_KEY not set: skipping tests that need the Realtime API.")
+    client = OpenAIRealtimeClient(URL, HEADERS)
+    print("\n--- Fixture Setup: Connecting and waiting for session.created ---")
+    connected_and_created = client.connect_and_wait_for_session_created(timeout=15)
+    if not connected_and_created:
+        # pytest caches a session fixture's outcome, so every later test skips at once
+        # instead of paying its own connect timeout against an unreachable endpoint
+        pytest.skip("Realtime API unreachable: failed to connect or receive session.created event.")
+    yield client
+    # Teardown: Close the connection after all tests complete
+    print("\n--- Fixture Teardown: Closing WebSocket connection ---")
+    client.close_connection()
+
+@pytest.fixture(scope="session")
+def next_event_id():
+    """
+    Returns a callable producing client event IDs that are unique for the whole test
+    session (event_1, event_2, ...), unlike second-resolution timestamps, which collide
+    when two steps run within the same second.
+    """
+    counter = itertools.count(1)
+    return lambda: f"event_{next(counter)}"
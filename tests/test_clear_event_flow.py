@@ -1,73 +1,39 @@
 # test_websocket_flow.py
 import pytest
-import sys
-import os
-import aifc
-import sunau
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from src.openai_client import OpenAIRealtimeClient, URL, HEADERS
-import time
 import traceback
 
-# A pytest fixture to provide a client instance and ensure cleanup
-@pytest.fixture(scope="module")
-def openai_realtime_client():
-    """
-    Fixture to provide an OpenAIRealtimeClient instance for tests.
-    Ensures the connection is closed after tests in the module are done.
-    """
-    client = OpenAIRealtimeClient(URL, HEADERS)
-    yield client
-    # # Teardown: Close the connection after the test(s) complete
-    # print("\n--- Fixture Teardown: Closing WebSocket connection ---")
-    # client.close_connection()
-
-def test_websocket_session_flow(openai_realtime_client):
+def test_websocket_session_flow(openai_realtime_client, next_event_id):
     """
     Tests the sequence of WebSocket connection, session creation,
     sending an update, and receiving a session update.
     """
     client = openai_realtime_client
 
-    # Step 1: Connect to WebSocket and wait for session.created
-    print("\n--- Test Step 1: Connecting and waiting for session.created ---")
-    connected_and_created = client.connect_and_wait_for_session_created(timeout=15)
-    assert connected_and_created, "Failed to connect or receive session.created event."
+    # Step 1: The shared fixture has already connected and received session.created
+    print("\n--- Test Step 1: Checking the shared connection ---")
     assert client.is_connected, "Client is not connected after session.created."
     assert client.global_session_id is not None, "session.id was not captured after session.created."
     print(f"Captured Session ID: {client.global_session_id}")
 
-    # Give a small buffer time if needed, though the events should be fast
-    time.sleep(1)
-    
-    # Step 2: Send session.update event and wait for session.updated
+    # Step 2: Reset the shared session (drops earlier tests' messages) and wait for session.updated
     print("\n--- Test Step 2: Sending session.update and waiting for session.updated ---")
-    event_id = client.send_session_update_and_wait_for_updated(timeout=10)
+    event_id = client.reset_session(timeout=10)
     assert event_id, "Failed to send session.update or receive session.updated event."
     assert client.is_connected, "Client disconnected after session.updated."
     print(f"Fetched event_id: {event_id}")
 
-    # #Step 3: Generate base64 audio from a file
+    # Steps 3-4: Stream the audio file as input_audio_buffer.append events, encoding each chunk
+    # as it is sent, and wait for input_audio_buffer.speech_started
     audio_filename = "answer_5_20250324_192921_pcm16.wav"  # Place your file in data/audio/
-    base64_audio = client.get_audio_base64_from_data_folder(audio_filename, save_processed_files=True)
-    assert base64_audio is not None, "Failed to generate base64 string from audio file"
-    print("Base64 audio string (first 100 chars):", base64_audio[:100])
-
-
-    # Step 4: Send input_audio_buffer.append event and wait for input_audio_buffer.speech_started
-    result = client.send_audio_buffer_and_validate_speech_started(event_id, base64_audio)
+    result = client.stream_audio_and_validate_speech_started(event_id, audio_filename)
     if not result:
-        print("Latest received message:", getattr(client, "latest_received_message", None))
-        time.sleep(5)  # Give the server a moment to respond, if needed
-        print("Latest received message after wait:", getattr(client, "latest_received_message", None))
+        print("Messages received meanwhile:", client.drain(timeout=0.05)) # Returns at once if anything is buffered
 
    # Step 5: send input_audio_buffer.commit_and_validate conversation.item.input_audio_transcription.completed event
     # ...existing code...
     commit_responses = client.send_audio_buffer_commit_and_validate(event_id, timeout=10)
     if not commit_responses:
-        print("Latest received message:", getattr(client, "latest_received_message", None))
-        time.sleep(5)  # Give the server a moment to respond, if needed
-        print("Latest received message after wait:", getattr(client, "latest_received_message", None))
+        print("Messages received meanwhile:", client.drain(timeout=0.05)) # Returns at once if anything is buffered
         # Handle failure case - perhaps skip further steps or exit
         transcript = None
         item_id = None
@@ -82,14 +48,12 @@ def test_websocket_session_flow(openai_realtime_client):
 
    # Step 6: Send audio buffer clear event and validate response
     print("\n--- Test Step 6: Sending input_audio_buffer.clear and validating response ---")
-    clear_event_id = f"event_{int(time.time())}"  # Generate a unique event ID
+    clear_event_id = next_event_id()  # Unique across the whole test session
     clear_response = client.send_audio_buffer_clear_and_validate(clear_event_id, timeout=10)
         
     if not clear_response:
         print("Failed to clear audio buffer or validate response")
-        print("Latest received message:", getattr(client, "latest_received_message", None))
-        time.sleep(2)  # Give some time for any delayed messages
-        print("Latest received message after wait:", getattr(client, "latest_received_message", None))
+        print("Messages received meanwhile:", client.drain(timeout=0.05)) # Returns at once if anything is buffered
     else:
         print(f"Successfully cleared audio buffer with response type: {clear_response.get('type')}")
         print(f"Clear response event ID: {clear_response.get('event_id')}")
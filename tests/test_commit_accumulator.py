@@ -0,0 +1,44 @@
+# test_commit_accumulator.py
+# Offline checks of the commit response collection; needs no connection, fixture or OPENAI_API_KEY
+from src.openai_client import _CommitAccumulator, _COMMIT_RESPONSE_TYPES
+
+DELTA = "conversation.item.input_audio_transcription.delta"
+COMPLETED = "conversation.item.input_audio_transcription.completed"
+CREATED = "conversation.item.created"
+
+def test_entries_start_empty():
+    responses = _CommitAccumulator().finish()
+    assert tuple(responses) == _COMMIT_RESPONSE_TYPES
+    assert all(value is None for entry in responses.values() for value in entry.values())
+
+def test_deltas_are_joined_in_order():
+    acc = _CommitAccumulator()
+    for delta in ("Hello", ", ", "world"):
+        acc.record({"type": DELTA, "event_id": "event_1", "delta": delta})
+    acc.record({"type": COMPLETED, "event_id": "event_2", "transcript": "Hello, world."})
+    responses = acc.finish()
+    assert responses[DELTA]["transcript"] == "Hello, world", f"Deltas joined wrongly: {responses[DELTA]}"
+    assert responses[COMPLETED]["transcript"] == "Hello, world.", "Consolidated transcript was overwritten."
+
+def test_completed_falls_back_to_streamed_text():
+    acc = _CommitAccumulator()
+    acc.record({"type": DELTA, "event_id": "event_1", "delta": "Hi"})
+    acc.record({"type": COMPLETED, "event_id": "event_2", "transcript": None})
+    assert acc.finish()[COMPLETED]["transcript"] == "Hi", "Empty completed transcript did not fall back to the deltas."
+
+def test_item_created_captures_content_transcript():
+    acc = _CommitAccumulator()
+    acc.record({"type": CREATED, "event_id": "event_1", "item": {"id": "item_1", "content": [{"type": "input_audio", "transcript": "Hi"}]}})
+    acc.record({"type": "input_audio_buffer.committed", "event_id": "event_2"})
+    responses = acc.finish()
+    assert responses[CREATED]["transcript"] == "Hi"
+    assert responses["input_audio_buffer.committed"]["transcript"] is None
+    assert responses[DELTA]["transcript"] is None, "Transcript was set although no delta arrived."
+
+def test_record_reports_end_of_transcription():
+    acc = _CommitAccumulator()
+    assert not acc.record({"type": "input_audio_buffer.committed", "event_id": "event_1", "item_id": "item_1"})
+    assert not acc.record({"type": "response.created", "event_id": "event_2"}), "Unrelated message ended the collection."
+    assert acc.record({"type": "conversation.item.input_audio_transcription.failed", "event_id": "event_3"}), "Failed transcription did not end the collection."
+    assert acc.received_types == {"input_audio_buffer.committed"}, f"Unexpected types recorded: {acc.received_types}"
+    assert acc.finish()["input_audio_buffer.committed"]["item_id"] == "item_1"
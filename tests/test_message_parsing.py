@@ -0,0 +1,41 @@
+# test_message_parsing.py
+# Offline checks of the receive path; needs no connection, fixture or OPENAI_API_KEY
+from src.openai_client import OpenAIRealtimeClient, URL, HEADERS, _peek_type
+
+AUDIO_DELTA_FRAME = '{"type":"response.audio.delta","event_id":"event_1","delta":"AAAA"}'
+
+def test_unparsed_type_is_dropped_without_handler():
+    client = OpenAIRealtimeClient(URL, HEADERS)
+    client.on_message(None, AUDIO_DELTA_FRAME)
+    assert client.get_last_message("response.audio.delta") is None, "Audio delta was parsed although nothing consumes it."
+
+def test_registered_handler_receives_unparsed_type():
+    client = OpenAIRealtimeClient(URL, HEADERS)
+    received = []
+    client.register_handler("response.audio.delta", received.append)
+    client.on_message(None, AUDIO_DELTA_FRAME)
+    assert len(received) == 1, "Handler registered for an unparsed type was not called."
+    assert received[0]["delta"] == "AAAA", f"Handler got the wrong message: {received[0]}"
+
+def test_peek_type_reads_leading_type():
+    assert _peek_type('{"type":"response.audio.delta","delta":"AAAA"}') == "response.audio.delta"
+    assert _peek_type(b'{ "type" : "session.created" }') == "session.created", "Whitespace or bytes frame not peeked."
+
+def test_peek_type_gives_up_on_reordered_or_escaped_type():
+    assert _peek_type('{"event_id":"event_1","type":"response.audio.delta"}') is None, "Peek must only match a leading type key."
+    assert _peek_type(r'{"type":"response.audio.delta\"x"}') is None, "Escaped type value must not be peeked."
+    assert _peek_type(r'{"t\u0079pe":"response.audio.delta"}') is None, "Escaped type key must not be peeked."
+
+def test_reordered_unparsed_type_is_parsed_normally():
+    client = OpenAIRealtimeClient(URL, HEADERS)
+    client.on_message(None, '{"event_id":"event_1","type":"response.audio.delta","delta":"AAAA"}')
+    assert client.get_last_message("response.audio.delta") is not None, "Frame the peek cannot identify was dropped."
+
+def test_bytes_frames_are_skipped_or_parsed():
+    # With UTF-8 validation skipped, websocket-client delivers text frames as bytes
+    client = OpenAIRealtimeClient(URL, HEADERS)
+    client.on_message(None, AUDIO_DELTA_FRAME.encode())
+    assert client.get_last_message("response.audio.delta") is None, "Bytes audio delta was parsed although nothing consumes it."
+    client.on_message(None, b'{"type":"input_audio_buffer.cleared","event_id":"event_2"}')
+    cleared = client.get_last_message("input_audio_buffer.cleared")
+    assert cleared is not None and cleared["event_id"] == "event_2", "Bytes frame was not parsed."
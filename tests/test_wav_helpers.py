@@ -0,0 +1,44 @@
+# test_wav_helpers.py
+# Offline checks of the WAV header packing and data-chunk lookup; needs no connection, fixture or OPENAI_API_KEY
+import io
+import struct
+import wave
+import pytest
+from src.openai_client import _pcm16_wav_header, _wav_data_chunk
+
+SAMPLES = bytes(range(100))
+
+def riff(*chunks):
+    """Builds a RIFF/WAVE file from (chunk_id, payload) pairs, padding odd-sized payloads."""
+    body = b"".join(chunk_id + struct.pack("<I", len(payload)) + payload + b"\0" * (len(payload) & 1)
+                    for chunk_id, payload in chunks)
+    return b"RIFF" + struct.pack("<I", 4 + len(body)) + b"WAVE" + body
+
+FMT_CHUNK = (b"fmt ", struct.pack("<HHIIHH", 1, 1, 16000, 32000, 2, 16))
+
+def test_pcm16_wav_header_layout():
+    header = _pcm16_wav_header(len(SAMPLES), 16000)
+    assert len(header) == 44, f"Expected a 44-byte header, got {len(header)} bytes."
+    with wave.open(io.BytesIO(header + SAMPLES)) as wav:
+        assert wav.getnchannels() == 1
+        assert wav.getsampwidth() == 2
+        assert wav.getframerate() == 16000
+        assert wav.getnframes() == len(SAMPLES) // 2
+        assert wav.readframes(wav.getnframes()) == SAMPLES
+
+def test_data_chunk_of_canonical_wav():
+    wav_bytes = _pcm16_wav_header(len(SAMPLES), 16000) + SAMPLES
+    assert bytes(_wav_data_chunk(wav_bytes)) == SAMPLES
+
+def test_data_chunk_after_list_chunk():
+    wav_bytes = riff(FMT_CHUNK, (b"LIST", b"INFOISFT\x06\x00\x00\x00Lavf\x00\x00"), (b"data", SAMPLES))
+    assert bytes(_wav_data_chunk(wav_bytes)) == SAMPLES, "LIST chunk before data was not skipped."
+
+def test_data_chunk_after_odd_sized_chunk():
+    # The 3-byte chunk is followed by a pad byte that must be skipped as well
+    wav_bytes = riff(FMT_CHUNK, (b"junk", b"abc"), (b"data", SAMPLES))
+    assert bytes(_wav_data_chunk(wav_bytes)) == SAMPLES, "Pad byte after an odd-sized chunk was not skipped."
+
+def test_missing_data_chunk_raises():
+    with pytest.raises(ValueError):
+        _wav_data_chunk(riff(FMT_CHUNK))